@@ -1,12 +1,15 @@
+import os
 import sys
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 sys.path.append(".")
 
 from src.utils.logger import logger
+from src.initializer import initializer
 from src.routers import video_router
 from src.utils.constant import DEFAULT_HOST, DEFAULT_PORT
 
@@ -16,6 +19,9 @@ async def lifespan(application: FastAPI):
     """Manage application lifecycle"""
     try:
         logger.info("Starting Video Analysis API")
+        # Models and API clients are loaded here, once, before serving
+        # requests; handlers are constructed lazily on first use
+        await initializer.initialize_models()
         yield
     finally:
         logger.info("Shutting down Video Analysis API")
@@ -26,6 +32,7 @@ app = FastAPI(
     description="API for video processing, object detection and depth estimation",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -46,5 +53,7 @@ if __name__ == "__main__":
         "src.app:app",
         host=DEFAULT_HOST,
         port=DEFAULT_PORT,
-        reload=True
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", 4))
     )
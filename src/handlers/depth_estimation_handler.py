@@ -1,9 +1,11 @@
-from typing import List
+from asyncio import current_task, get_running_loop, sleep, to_thread
+from typing import List, Tuple
 
 from src.utils.logger import logger
-from src.helpers.depth_helper import predict
+from src.helpers.depth_helper import compute_depth_map, predict, predict_batch
 from src.initializer import initializer
 from src.schemas.detection import DetectedObject
+from src.utils.constant import DEPTH_BATCH_MAX, DEPTH_BATCH_WINDOW
 
 class DepthEstimationHandler:
     """Handler for depth estimation of detected objects"""
@@ -13,21 +15,25 @@ class DepthEstimationHandler:
         
         self.depth_model = initializer.get_depth_model()
         
-    def estimate_depths(self, objects: List[DetectedObject], image_path: str) -> list:
+    async def estimate_depths(self, objects: List[DetectedObject], image_path: str, image=None) -> list:
         """
         Estimate depths for detected objects
-        
+
+        The model forward pass runs in a worker thread so callers can
+        simply await this without blocking the event loop.
+
         Args:
             objects (list): List of detected objects with bounding boxes
             image_path (str): Path to the image file
-            
+            image (optional): Already-decoded PIL image for this path
+
         Returns:
             list: Objects with added depth information
         """
         try:
-            
+
             # Use depth model to estimate depths
-            results = predict(self.depth_model, objects, image_path)
+            results = await to_thread(predict, self.depth_model, objects, image_path, image)
             
             # Log results for debugging
             logger.debug(f"Depth estimation results: {results}")
@@ -36,4 +42,112 @@ class DepthEstimationHandler:
             
         except Exception as e:
             logger.error(f"Error in depth estimation: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+    async def warm_depth_map(self, image_path: str, image=None):
+        """
+        Compute and cache the frame's depth map without sampling objects
+
+        The map depends only on the image, so callers can overlap this
+        with object detection and sample the boxes once both finish.
+
+        Args:
+            image_path (str): Path to the image file
+            image (optional): Already-decoded PIL image for this path
+        """
+        try:
+            await to_thread(compute_depth_map, self.depth_model, image_path, image)
+        except Exception as e:
+            logger.error(f"Error warming depth map: {str(e)}")
+
+    def estimate_depths_batch(self, frames: List[Tuple[List[DetectedObject], str, object]]) -> List[list]:
+        """
+        Estimate depths for detected objects across multiple frames with a
+        single batched forward pass
+
+        Args:
+            frames (List[Tuple[List[DetectedObject], str, object]]):
+                Triples of (detected objects, image path, decoded image
+                or None), one per frame
+
+        Returns:
+            List[list]: Objects with added depth information, per frame
+        """
+        try:
+            objects_list = [objects for objects, _, _ in frames]
+            image_paths = [image_path for _, image_path, _ in frames]
+            images = [image for _, _, image in frames]
+
+            results = predict_batch(self.depth_model, objects_list, image_paths, images=images)
+
+            logger.debug(f"Batched depth estimation over {len(frames)} frames")
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in batched depth estimation: {str(e)}")
+            return [[] for _ in frames]
+
+class DepthBatcher:
+    """Groups concurrent depth requests into batched forward passes
+
+    Frames processed in parallel all hit the depth model around the same
+    time; requests arriving within a short window are flushed together
+    through estimate_depths_batch, so several frames cost one model call.
+    """
+
+    def __init__(self, handler: DepthEstimationHandler, max_batch: int = DEPTH_BATCH_MAX, window: float = DEPTH_BATCH_WINDOW):
+        self._handler = handler
+        self._max_batch = max_batch
+        self._window = window
+        self._pending = []  # (objects, image_path, image, future)
+        self._flush_task = None
+
+    async def estimate(self, objects: List[DetectedObject], image_path: str, image=None) -> list:
+        """
+        Queue a depth request and await its result
+
+        Args:
+            objects (list): Detected objects for the frame
+            image_path (str): Path to the frame image
+            image (optional): Already-decoded PIL image for this path;
+                spares the batch a second disk read and decode
+
+        Returns:
+            list: Objects with added depth information
+        """
+        loop = get_running_loop()
+        future = loop.create_future()
+        self._pending.append((objects, image_path, image, future))
+
+        if len(self._pending) >= self._max_batch:
+            await self._flush()
+        elif self._flush_task is None:
+            self._flush_task = loop.create_task(self._delayed_flush())
+
+        return await future
+
+    async def _delayed_flush(self):
+        await sleep(self._window)
+        await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, []
+        flush_task, self._flush_task = self._flush_task, None
+        if flush_task is not None and flush_task is not current_task():
+            flush_task.cancel()
+        if not batch:
+            return
+
+        frames = [(objects, image_path, image) for objects, image_path, image, _ in batch]
+        try:
+            # depth_helper's model lock serializes the forward pass
+            # against single-frame predicts and warm-ups
+            results = await to_thread(self._handler.estimate_depths_batch, frames)
+        except Exception as e:
+            logger.error(f"Error flushing depth batch: {str(e)}")
+            results = [[] for _ in batch]
+
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -1,13 +1,27 @@
-from typing import List, Tuple
+from typing import List
 
 from src.utils.logger import logger
 from src.schemas import NavigationGuide, ObjectWithDepth
 from src.helpers.navigation_helper import (
-    sort_objects_by_priority,
+    top_scored_objects,
     generate_optimized_guidance,
-    get_priority_score
+    make_score_scratch
+)
+from src.utils.constant import WARNING_THRESHOLD, MAX_OBJECTS
+
+# Fixed responses built once; they are serialized, never mutated
+_NO_OBJECTS_GUIDE = NavigationGuide(
+    navigation_text="No objects detected, the path ahead is clear.",
+    priority_objects=[]
+)
+_NO_OBSTACLES_GUIDE = NavigationGuide(
+    navigation_text="No significant obstacles detected, proceed with caution.",
+    priority_objects=[]
+)
+_ERROR_GUIDE = NavigationGuide(
+    navigation_text="Unable to generate accurate guidance. Please move carefully.",
+    priority_objects=[]
 )
-from src.utils.constant import WARNING_HIGH_THRESHOLD, WARNING_MEDIUM_THRESHOLD, WARNING_THRESHOLD
 
 class NavigationGuideHandler:
     """Handler for creating navigation guidance from objects and depth information using Priority Score method"""
@@ -15,27 +29,16 @@ class NavigationGuideHandler:
     def __init__(self):
         """Initialize navigation guide handler"""
         logger.info("Initializing Navigation Guide Handler with Priority Score")
-        
-    def _get_warning_level(self, priority_score: float) -> str:
-        """
-        Determine warning level based on Priority Score
-        
-        Args:
-            priority_score (float): Priority score (0-1)
-            
-        Returns:
-            str: Warning level (High/Medium/None)
-        """
-        if priority_score > WARNING_HIGH_THRESHOLD:
-            return "High" 
-        elif priority_score > WARNING_MEDIUM_THRESHOLD:
-            return "Medium"
-        else:
-            return "None"
-            
-    async def generate_navigation_guide(self, objects_with_depth: List[ObjectWithDepth]) -> NavigationGuide:
+        # Reused scoring buffers; generate_navigation_guide runs on the
+        # event loop without awaiting, so calls never interleave
+        self._score_scratch = make_score_scratch(MAX_OBJECTS)
+
+    def generate_navigation_guide(self, objects_with_depth: List[ObjectWithDepth]) -> NavigationGuide:
         """
         Generate navigation guidance using Priority Score method
+
+        Pure CPU work with no awaits, so it runs as a plain function
+        instead of paying coroutine scheduling overhead per frame.
         
         Args:
             objects_with_depth (List[ObjectWithDepth]): List of objects with depth information
@@ -45,56 +48,37 @@ class NavigationGuideHandler:
         """
         try:
             if not objects_with_depth:
-                return NavigationGuide(
-                    navigation_text="No objects detected, the path ahead is clear.",
-                    priority_objects=[]
-                )
-            
-            # Sort objects by priority using Priority Score
-            sorted_objects = sort_objects_by_priority(objects_with_depth)
+                return _NO_OBJECTS_GUIDE
             
-            # Get the most important objects (maximum 3)
-            important_objects = sorted_objects[:3]
-            
-            # Filter out objects below the minimum threshold
+            # One vectorized scoring pass selects the most important
+            # objects (maximum 3) and classifies them from the same
+            # scores, so nothing is scored twice
+            important_objects, scores, levels = top_scored_objects(
+                objects_with_depth, scratch=self._score_scratch
+            )
+
             filtered_objects = []
             warning_levels = []
-            
-            for obj in important_objects:
-                # Calculate priority score for the object
-                p_score = get_priority_score(obj)
-                
-                # Skip objects with low priority score
+            for obj, p_score, warning_level in zip(important_objects, scores, levels):
                 if p_score <= WARNING_THRESHOLD:
                     continue
-                
-                # Add object to filtered list
                 filtered_objects.append(obj)
-                
-                # Determine warning level
-                warning_level = self._get_warning_level(p_score)
                 warning_levels.append(warning_level)
             
             # Check if we have any important objects left
             if not filtered_objects:
-                return NavigationGuide(
-                    navigation_text="No significant obstacles detected, proceed with caution.",
-                    priority_objects=[]
-                )
+                return _NO_OBSTACLES_GUIDE
             
             # Generate optimized guidance text with warning level
             navigation_text = generate_optimized_guidance(filtered_objects, warning_levels)
             
-            priority_objects_dict = [obj.model_dump() for obj in filtered_objects]
-
+            # priority_objects is List[ObjectWithDepth], so the validated
+            # models pass straight through without a dump/revalidate cycle
             return NavigationGuide(
                 navigation_text=navigation_text,
-                priority_objects=priority_objects_dict
+                priority_objects=filtered_objects
             )
                 
         except Exception as e:
             logger.error(f"Error generating navigation guidance: {str(e)}")
-            return NavigationGuide(
-                navigation_text="Unable to generate accurate guidance. Please move carefully.",
-                priority_objects=[]
-            )
\ No newline at end of file
+            return _ERROR_GUIDE
\ No newline at end of file
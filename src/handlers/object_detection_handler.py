@@ -1,54 +1,202 @@
 from google.genai import types
+from asyncio import gather, Semaphore, to_thread
+from collections import OrderedDict
 from typing import List
 
+import numpy as np
+from PIL import Image
+
 from src.utils.logger import logger
-from src.helpers.gemini_helper import call_api
-from src.utils.constant import PROMPT_TEMPLATE, CATEGORY, THRESHOLD, SYSTEM_INSTRUCTION, GEMINI_MODEL_NAME, EXCLUDED_OBJECTS
+from src.helpers.gemini_helper import call_api, call_api_batch
+from src.helpers.video_helper import load_frame_image
+from src.utils.constant import (
+    PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE, CATEGORY, THRESHOLD, SYSTEM_INSTRUCTION,
+    GEMINI_MODEL_NAME, GEMINI_TEMPERATURE, EXCLUDED_OBJECTS, EXCLUDED_TYPES,
+    CONCURRENCY_LIMIT, DETECTION_CACHE_SIZE, FRAME_DEDUPE_HAMMING_THRESHOLD,
+    GEMINI_BATCH_MAX
+)
 from src.initializer import initializer
 from src.schemas.detection import DetectedObject
 
+# LRU cache of detection results keyed by frame dHash, so visually
+# identical frames reuse a previous API response instead of a new call
+_detection_cache: OrderedDict = OrderedDict()
+
+def _image_dhash(image: Image.Image) -> int:
+    """Difference hash of an image as an integer (64-bit)"""
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.Resampling.BILINEAR), dtype=np.int16)
+    return int.from_bytes(np.packbits(pixels[:, 1:] > pixels[:, :-1]).tobytes(), "big")
+
+def _cached_detection(frame_hash: int):
+    """Look up cached objects for a hash, tolerating near matches"""
+    cached = _detection_cache.get(frame_hash)
+    if cached is None:
+        # Fall back to a scan for a near-identical frame
+        for key, value in _detection_cache.items():
+            if (key ^ frame_hash).bit_count() <= FRAME_DEDUPE_HAMMING_THRESHOLD:
+                frame_hash, cached = key, value
+                break
+    if cached is not None:
+        _detection_cache.move_to_end(frame_hash)
+    return cached
+
+def _store_detection(frame_hash: int, objects: List[DetectedObject]):
+    """Remember a detection result, evicting the oldest at capacity"""
+    _detection_cache[frame_hash] = objects
+    if len(_detection_cache) > DETECTION_CACHE_SIZE:
+        _detection_cache.popitem(last=False)
+
 
 class ObjectDetectionHandler:
     """Handler for object detection using Gemini API"""
-    
+
+    # Safety settings and generation config depend only on constants, so
+    # build them once at class definition instead of per instance
+    SAFETY_SETTINGS = (
+        types.SafetySetting(
+            category=CATEGORY,
+            threshold=THRESHOLD,
+        ),
+    )
+    GENERATION_CONFIG = types.GenerateContentConfig(
+        system_instruction=SYSTEM_INSTRUCTION,
+        temperature=GEMINI_TEMPERATURE,
+        safety_settings=list(SAFETY_SETTINGS),
+        response_mime_type="application/json",
+        response_schema=list[DetectedObject]
+    )
+    # Multi-image requests return one object list per image
+    BATCH_GENERATION_CONFIG = types.GenerateContentConfig(
+        system_instruction=SYSTEM_INSTRUCTION,
+        temperature=GEMINI_TEMPERATURE,
+        safety_settings=list(SAFETY_SETTINGS),
+        response_mime_type="application/json",
+        response_schema=list[list[DetectedObject]]
+    )
+
     def __init__(self, model_name=GEMINI_MODEL_NAME):
         """
         Initialize the handler
-        
+
         Args:
             gemini_client: Gemini client
             model_name: Name of the model to use
         """
         self.gemini_client = initializer.get_gemini_client()
         self.model_name = model_name
-        # Safety settings
-        self.safety_settings = [
-            types.SafetySetting(
-                category=CATEGORY,
-                threshold=THRESHOLD,
-            ),
-        ]
-        
-    async def detect_objects(self, image_path: str) -> List[DetectedObject]:
+
+    async def detect_objects(self, image_path: str, image=None) -> List[DetectedObject]:
         """
         Detect objects in an image using Gemini API
-        
+
         Args:
             image_path (str): Path to image file
-            
+            image (optional): Already-decoded PIL image for this path
+
         Returns:
             list: Detected objects with bounding boxes
         """
+        if image is None:
+            # Eager decode on the worker thread; a lazy Image.open would
+            # defer the JPEG decode into _image_dhash on the event loop
+            image = await to_thread(load_frame_image, image_path)
+
+        frame_hash = _image_dhash(image)
+        cached = _cached_detection(frame_hash)
+        if cached is not None:
+            logger.info(f"Reusing cached detection for visually identical frame: {image_path}")
+            return list(cached)
 
         objects = await call_api(
             self.gemini_client,
             PROMPT_TEMPLATE,
-            SYSTEM_INSTRUCTION,
-            self.safety_settings,
+            self.GENERATION_CONFIG,
             self.model_name,
-            image_path
+            image_path,
+            image=image
         )
 
-        filtered_objects = [obj for obj in objects if obj.label not in EXCLUDED_OBJECTS and obj.type not in ['geographical feature', 'atmospheric', 'body of water', 'surface']]
+        filtered_objects = [obj for obj in objects if obj.label not in EXCLUDED_OBJECTS and obj.type not in EXCLUDED_TYPES]
+
+        _store_detection(frame_hash, filtered_objects)
+
         return filtered_objects
 
+    async def detect_objects_batch(self, image_paths: List[str]) -> List[List[DetectedObject]]:
+        """
+        Detect objects in several images concurrently
+
+        Requests are fanned out with a bounded semaphore so a batch of
+        frames amortizes round-trip latency without overwhelming the API.
+
+        Args:
+            image_paths (List[str]): Paths to image files
+
+        Returns:
+            List[List[DetectedObject]]: Detected objects per image, aligned
+                with image_paths
+        """
+        # Batches coalesce into multi-image requests of at most
+        # GEMINI_BATCH_MAX frames each, which amortizes the HTTPS round
+        # trip and per-request overhead; if any batched answer cannot be
+        # used, fall through to the per-image fan-out below
+        if len(image_paths) > 1:
+            chunks = [image_paths[i:i + GEMINI_BATCH_MAX] for i in range(0, len(image_paths), GEMINI_BATCH_MAX)]
+            chunk_results = await gather(*(self._detect_batch_coalesced(chunk) for chunk in chunks))
+            if all(result is not None for result in chunk_results):
+                return [objects for chunk in chunk_results for objects in chunk]
+
+        semaphore = Semaphore(CONCURRENCY_LIMIT)
+
+        async def detect_one(image_path: str) -> List[DetectedObject]:
+            async with semaphore:
+                return await self.detect_objects(image_path)
+
+        results = await gather(*(detect_one(path) for path in image_paths))
+        return list(results)
+
+    async def _detect_batch_coalesced(self, image_paths: List[str]):
+        """
+        Resolve a batch with cache lookups plus one multi-image request
+
+        Frames whose dHash matches a cached detection are served locally;
+        only the misses are uploaded, all in a single Gemini call.
+
+        Args:
+            image_paths (List[str]): Paths to image files
+
+        Returns:
+            List[List[DetectedObject]] | None: Detected objects per image,
+                or None when the batched call failed and the caller should
+                fall back to concurrent single-image requests
+        """
+        images = await gather(*(to_thread(load_frame_image, path) for path in image_paths))
+        hashes = [_image_dhash(image) for image in images]
+
+        results = [None] * len(image_paths)
+        miss_indices = []
+        for i, frame_hash in enumerate(hashes):
+            cached = _cached_detection(frame_hash)
+            if cached is not None:
+                results[i] = list(cached)
+            else:
+                miss_indices.append(i)
+
+        if miss_indices:
+            batch_objects = await call_api_batch(
+                self.gemini_client,
+                BATCH_PROMPT_TEMPLATE,
+                self.BATCH_GENERATION_CONFIG,
+                self.model_name,
+                [images[i] for i in miss_indices]
+            )
+            if batch_objects is None:
+                return None
+
+            for i, objects in zip(miss_indices, batch_objects):
+                filtered_objects = [obj for obj in objects if obj.label not in EXCLUDED_OBJECTS and obj.type not in EXCLUDED_TYPES]
+                _store_detection(hashes[i], filtered_objects)
+                results[i] = filtered_objects
+
+        return results
+
@@ -1,13 +1,19 @@
-import wave
-import contextlib
-import io
+import hashlib
+import struct
+from asyncio import ensure_future
+from collections import OrderedDict
+from pathlib import Path
+
+import aiofiles
+import orjson
 
 from src.utils.logger import logger
 from src.schemas.audio import AudioResponse
 from src.utils.constant import (
-    OPENAI_MODEL_NAME, OPENAI_TTS_VOICE, 
+    OPENAI_MODEL_NAME, OPENAI_TTS_VOICE,
     TTS_ENGINE_OPENAI, TTS_ENGINE_GTTS, TTS_ENGINE_KOKORO,
-    GTTS_LANGUAGE, KOKORO_VOICE, KOKORO_SPEED
+    GTTS_LANGUAGE, KOKORO_VOICE, KOKORO_SPEED,
+    OUTPUT_AUDIO_PATH, TTS_CACHE_SIZE
 )
 from src.helpers.tts_helper import (
     call_openai_api, call_gtts, call_kokoro
@@ -15,16 +21,129 @@ from src.helpers.tts_helper import (
 from src.initializer import initializer
 
 
+def _wav_duration(audio_data: bytes):
+    """
+    Read the duration straight out of a WAV header
+
+    Walks the RIFF chunks with struct instead of handing the whole
+    payload to the wave module, which re-buffers it via BytesIO.
+
+    Args:
+        audio_data (bytes): WAV file contents
+
+    Returns:
+        float | None: Duration in seconds, or None if not parseable
+    """
+    try:
+        if len(audio_data) < 44 or audio_data[:4] != b'RIFF' or audio_data[8:12] != b'WAVE':
+            return None
+
+        offset = 12
+        byte_rate = None
+        while offset + 8 <= len(audio_data):
+            chunk_id = audio_data[offset:offset + 4]
+            chunk_size = struct.unpack_from('<I', audio_data, offset + 4)[0]
+            if chunk_id == b'fmt ':
+                byte_rate = struct.unpack_from('<I', audio_data, offset + 16)[0]
+            elif chunk_id == b'data' and byte_rate:
+                return chunk_size / byte_rate
+            # Chunks are word-aligned
+            offset += 8 + chunk_size + (chunk_size & 1)
+        return None
+    except Exception:
+        return None
+
+
 class TextToSpeechHandler:
     """Handler for text-to-speech conversion with multiple engine support"""
     
     def __init__(self, engine: str = TTS_ENGINE_KOKORO):
         self.engine = engine
         self.client = initializer.get_openai_client()
-        
+
         # Get TTS engines from initializer
         self.kokoro_pipeline = initializer.get_kokoro_pipeline()
         self.aiogTTS_engine = initializer.get_aiogTTS_engine()
+
+        # Engine dispatch table: one dict lookup per call instead of an
+        # if/elif chain; each entry is (synthesize coroutine, voice name)
+        self._dispatch = {
+            TTS_ENGINE_OPENAI: (self._synthesize_openai, OPENAI_TTS_VOICE),
+            TTS_ENGINE_GTTS: (self._synthesize_gtts, f"aiogTTS ({GTTS_LANGUAGE})"),
+            TTS_ENGINE_KOKORO: (self._synthesize_kokoro, KOKORO_VOICE),
+        }
+
+        # Navigation texts repeat heavily across frames ("the path ahead
+        # is clear", etc.), so cache synthesized audio: an in-memory LRU
+        # backed by WAV files that survive restarts
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_dir = Path(OUTPUT_AUDIO_PATH) / "_cache"
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # In-flight synthesis tasks by cache key; concurrent frames with
+        # identical text await one shared synthesis instead of racing
+        # duplicate engine calls (the engines offer no real batching API)
+        self._pending: dict = {}
+
+        # Engine settings folded into cache keys; disk entries outlive
+        # restarts, so a changed voice/speed/language must miss instead
+        # of serving audio synthesized under the old settings
+        self._cache_tags = {
+            TTS_ENGINE_OPENAI: f"{OPENAI_MODEL_NAME}|{OPENAI_TTS_VOICE}",
+            TTS_ENGINE_GTTS: GTTS_LANGUAGE,
+            TTS_ENGINE_KOKORO: f"{KOKORO_VOICE}|{KOKORO_SPEED}",
+        }
+
+    def _cache_key(self, engine: str, text: str) -> str:
+        tag = self._cache_tags.get(engine, "")
+        return hashlib.blake2b(f"{engine}|{tag}|{text}".encode(), digest_size=16).hexdigest()
+
+    async def _load_cached_audio(self, key: str):
+        """Fetch cached audio for a key from memory, then from disk"""
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        wav_path = self._cache_dir / f"{key}.wav"
+        if not wav_path.exists():
+            return None
+        async with aiofiles.open(wav_path, 'rb') as f:
+            audio_data = await f.read()
+
+        duration = None
+        meta_path = self._cache_dir / f"{key}.json"
+        if meta_path.exists():
+            async with aiofiles.open(meta_path, 'rb') as f:
+                duration = orjson.loads(await f.read()).get("duration")
+
+        self._remember(key, audio_data, duration)
+        return audio_data, duration
+
+    def _remember(self, key: str, audio_data: bytes, duration):
+        self._cache[key] = (audio_data, duration)
+        if len(self._cache) > TTS_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    async def _store_cached_audio(self, key: str, audio_data: bytes, duration):
+        """Persist synthesized audio so later runs can skip the engine"""
+        try:
+            self._remember(key, audio_data, duration)
+            async with aiofiles.open(self._cache_dir / f"{key}.wav", 'wb') as f:
+                await f.write(audio_data)
+            async with aiofiles.open(self._cache_dir / f"{key}.json", 'wb') as f:
+                await f.write(orjson.dumps({"duration": duration}))
+        except Exception as e:
+            logger.warning(f"Could not persist TTS cache entry: {str(e)}")
+
+    async def _synthesize_openai(self, text: str):
+        return await call_openai_api(self.client, OPENAI_MODEL_NAME, OPENAI_TTS_VOICE, text)
+
+    async def _synthesize_gtts(self, text: str):
+        return await call_gtts(GTTS_LANGUAGE, text, self.aiogTTS_engine), None
+
+    async def _synthesize_kokoro(self, text: str):
+        return await call_kokoro(KOKORO_VOICE, KOKORO_SPEED, text, self.kokoro_pipeline)
     
     def set_engine(self, engine: str):
         """Change TTS engine"""
@@ -53,35 +172,40 @@ class TextToSpeechHandler:
             
             logger.info(f"Converting text to speech using {current_engine} for {folder_name}, frame {frame_index}")
             
-            voice_used = ""
-            audio_data = None
-            
             # Call appropriate TTS API based on selected engine
-            if current_engine == TTS_ENGINE_OPENAI:
-                audio_data = await call_openai_api(self.client, OPENAI_MODEL_NAME, OPENAI_TTS_VOICE, text)
-                voice_used = OPENAI_TTS_VOICE
-            elif current_engine == TTS_ENGINE_GTTS:
-                audio_data = await call_gtts(GTTS_LANGUAGE, text, self.aiogTTS_engine)
-                voice_used = f"aiogTTS ({GTTS_LANGUAGE})"
-            elif current_engine == TTS_ENGINE_KOKORO:
-                audio_data = await call_kokoro(KOKORO_VOICE, KOKORO_SPEED, text, self.kokoro_pipeline)
-                voice_used = KOKORO_VOICE
-            else:
+            dispatch_entry = self._dispatch.get(current_engine)
+            if dispatch_entry is None:
                 logger.warning(f"Unknown engine {current_engine}, falling back to Kokoro")
-                audio_data = await call_kokoro(KOKORO_VOICE, KOKORO_SPEED, text, self.kokoro_pipeline)
-                voice_used = KOKORO_VOICE
-            
-            # Get audio duration if possible
-            duration = None
-            if audio_data:
-                try:
-                    # Try to get duration from bytes
-                    with contextlib.closing(wave.open(io.BytesIO(audio_data), 'r')) as f:
-                        frames = f.getnframes()
-                        rate = f.getframerate()
-                        duration = frames / float(rate)
-                except Exception as e:
-                    logger.warning(f"Could not get audio duration from bytes: {str(e)}")
+                dispatch_entry = self._dispatch[TTS_ENGINE_KOKORO]
+
+            synthesize, voice_used = dispatch_entry
+
+            # Reuse previously synthesized audio for identical text
+            key = self._cache_key(current_engine, text)
+            cached = await self._load_cached_audio(key)
+            if cached is not None:
+                logger.info(f"TTS cache hit for {folder_name}, frame {frame_index}")
+                audio_data, duration = cached
+            else:
+                pending = self._pending.get(key)
+                if pending is not None:
+                    # Another frame is already synthesizing this text
+                    audio_data, duration = await pending
+                else:
+                    pending = ensure_future(synthesize(text))
+                    self._pending[key] = pending
+                    try:
+                        audio_data, duration = await pending
+                    finally:
+                        self._pending.pop(key, None)
+                    if audio_data:
+                        await self._store_cached_audio(key, audio_data, duration)
+
+            # Get audio duration if the engine did not report it
+            if audio_data and duration is None:
+                duration = _wav_duration(audio_data)
+                if duration is None:
+                    logger.warning("Could not get audio duration from bytes")
             
             audio_response = AudioResponse(
                 audio_data=audio_data,
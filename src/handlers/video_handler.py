@@ -1,9 +1,9 @@
 from pathlib import Path
 from fastapi import UploadFile
-import aiofiles
 import os
-from datetime import datetime
-from asyncio import gather, Semaphore
+from time import perf_counter
+from functools import cache
+from asyncio import Queue, gather, to_thread
 from typing import List
 
 from src.utils.logger import logger
@@ -12,21 +12,48 @@ from src.helpers.video_helper import (
     validate_extension,
     cleanup_file,
     parse_frame_range,
-    get_video_folders
+    get_video_folders,
+    list_frame_files,
+    load_frame_image,
+    save_metadata
 )
 from src.handlers.object_detection_handler import ObjectDetectionHandler
-from src.handlers.depth_estimation_handler import DepthEstimationHandler
+from src.handlers.depth_estimation_handler import DepthEstimationHandler, DepthBatcher
 from src.handlers.navigation_guide_handler import NavigationGuideHandler
-from src.utils.constant import OUTPUT_FRAME_PATH, CONCURRENCY_LIMIT
+from src.utils.constant import OUTPUT_FRAME_PATH, CONCURRENCY_LIMIT, DETECTION_BATCH, UPLOAD_CHUNK_SIZE, MAX_UPLOAD_SIZE
 from src.handlers.text_to_speech_handler import TextToSpeechHandler
 from src.helpers.report_helper import save_execution_time_to_csv, save_video_analysis_to_csv
 from src.schemas.navigation import NavigationGuide
 from src.schemas import ExecutionTime, FrameAnalysis, VideoProcessingResult, AudioResponse, VideoAnalysisResponse
 
-object_detector = ObjectDetectionHandler()
-depth_estimator = DepthEstimationHandler()
-navigation_guide = NavigationGuideHandler()
-tts_handler = TextToSpeechHandler()
+# Handlers pull models and clients from the initializer, which the
+# FastAPI lifespan populates after import, so they are built lazily on
+# first use and reused afterwards
+@cache
+def _object_detector() -> ObjectDetectionHandler:
+    return ObjectDetectionHandler()
+
+@cache
+def _depth_estimator() -> DepthEstimationHandler:
+    return DepthEstimationHandler()
+
+@cache
+def _depth_batcher() -> DepthBatcher:
+    return DepthBatcher(_depth_estimator())
+
+@cache
+def _navigation_guide() -> NavigationGuideHandler:
+    return NavigationGuideHandler()
+
+@cache
+def _tts_handler() -> TextToSpeechHandler:
+    return TextToSpeechHandler()
+
+# Built once; serialized into responses, never mutated
+_EMPTY_NAVIGATION_GUIDE = NavigationGuide(
+    navigation_text="No objects detected, the path ahead is clear.",
+    priority_objects=[]
+)
 
 class VideoHandler:
     """Handler for video processing operations"""
@@ -35,6 +62,18 @@ class VideoHandler:
         self.output_path = Path(output_path)
         self.time_interval = time_interval
 
+    @staticmethod
+    def _save_upload(video_file: UploadFile, temp_path: Path):
+        """Blocking chunked copy of an upload to disk; runs off-loop"""
+        bytes_written = 0
+        with open(temp_path, 'wb') as out_file:
+            while chunk := video_file.file.read(UPLOAD_CHUNK_SIZE):
+                bytes_written += len(chunk)
+                if bytes_written > MAX_UPLOAD_SIZE:
+                    logger.error(f"Upload exceeded size limit while streaming: {video_file.filename}")
+                    raise Exception("File too large")
+                out_file.write(chunk)
+
     async def extract_frames(self, video_file: UploadFile) -> VideoProcessingResult:
         """
         Process uploaded video file
@@ -52,20 +91,33 @@ class VideoHandler:
                 logger.error(f"Invalid file extension: {video_file.filename}")
                 raise Exception("Invalid file type")
             
+            # Reject oversized uploads up front when the size is known
+            if video_file.size and video_file.size > MAX_UPLOAD_SIZE:
+                logger.error(f"Upload too large: {video_file.size} bytes")
+                raise Exception("File too large")
+
             logger.info(f"Processing video: {video_file.filename}")
 
-            # Save uploaded file
+            # Save uploaded file with one blocking copy in a worker
+            # thread instead of an event-loop round trip per chunk; the
+            # running count still enforces the limit when no size was
+            # declared, without materializing the video in memory
             temp_path = self.output_path / video_file.filename
-            async with aiofiles.open(temp_path, 'wb') as out_file:
-                content = await video_file.read()
-                await out_file.write(content)
+            await to_thread(self._save_upload, video_file, temp_path)
             
             frames_data = extract_frames(temp_path, self.output_path, time_interval=self.time_interval)
             if not frames_data:
                 raise Exception("Failed to process video")
             
             logger.info(f"Extracted {len(frames_data)} frames from video")
-            
+
+            # Save frame metadata alongside the extracted frames; packed
+            # mode already wrote metadata.json inside the archive, and the
+            # frame paths point into the zip rather than a folder
+            if not os.getenv("PACK_FRAMES"):
+                frames_folder = Path(frames_data[0].video_path).parent
+                await save_metadata(frames_data, frames_folder)
+
             # Cleanup video file after successful processing
             await cleanup_file(str(temp_path))
                 
@@ -91,28 +143,50 @@ class VideoHandler:
         frames_base_path = os.path.abspath(OUTPUT_FRAME_PATH)
         return get_video_folders(frames_base_path)
     
-    async def process_frame(self, folder_name: str, frame_idx: int, frame_path: str, tts_engine: str) -> FrameAnalysis:
+    async def process_frame(self, folder_name: str, frame_idx: int, frame_path: str, tts_engine: str,
+                            objects: list = None, detection_time: float = 0.0) -> FrameAnalysis:
         """
         Process a single frame asynchronously
-        
+
         Args:
             folder_name: Folder name containing frames
             frame_idx: Index of the frame to process
             frame_path: Path to the frame file
-            
+            objects: Pre-detected objects for the frame; when provided,
+                the detection stage is skipped
+            detection_time: Detection time already spent on this frame
+
         Returns:
             FrameAnalysis: Analysis results for the frame
         """
         logger.info(f"Processing frame: {os.path.basename(frame_path)} (index {frame_idx})")
-        
-        # Measure object detection time
-        obj_detection_start = datetime.now()
-        objects = await object_detector.detect_objects(frame_path)
-        obj_detection_time = (datetime.now() - obj_detection_start).total_seconds()
-        
+
+        # Wall-clock anchor for the total; detection done by the caller
+        # happened before this point, so it is added back below
+        frame_start = perf_counter()
+        predetected = objects is not None
+
+        frame_image = None
+        depth_prewarmed = False
+        if objects is None:
+            # Decode the frame once and reuse it for detection and depth
+            frame_image = await to_thread(load_frame_image, frame_path)
+
+            # Detection and the depth map are independent given the image,
+            # so overlap the Gemini round trip with the depth forward pass
+            # and sample boxes from the cached map afterwards; the stage
+            # time is the overlapped span, i.e. max of the two
+            obj_detection_start = perf_counter()
+            objects, _ = await gather(
+                _object_detector().detect_objects(frame_path, image=frame_image),
+                _depth_estimator().warm_depth_map(frame_path, image=frame_image),
+            )
+            detection_time = perf_counter() - obj_detection_start
+            depth_prewarmed = True
+
         # Create ExecutionTime object
         execution_time = ExecutionTime(
-            object_detection=obj_detection_time
+            object_detection=detection_time
         )
         
         objects_with_depth = []
@@ -121,42 +195,42 @@ class VideoHandler:
         
         if objects:
             # Measure depth estimation time
-            depth_start = datetime.now()
-            objects_with_depth = depth_estimator.estimate_depths(objects, frame_path)
-            depth_time = (datetime.now() - depth_start).total_seconds()
+            # The batcher groups concurrent frames into one forward pass
+            # and serializes device access internally
+            depth_start = perf_counter()
+            if depth_prewarmed:
+                # The map is already cached, so this only samples boxes
+                objects_with_depth = await _depth_estimator().estimate_depths(objects, frame_path, image=frame_image)
+            else:
+                objects_with_depth = await _depth_batcher().estimate(objects, frame_path, image=frame_image)
+            depth_time = perf_counter() - depth_start
             execution_time.depth_estimation = depth_time
             
             # Measure navigation guidance generation time
-            navigation_start = datetime.now()
-            navigation_guide_obj = await navigation_guide.generate_navigation_guide(objects_with_depth)
-            navigation_time = (datetime.now() - navigation_start).total_seconds()
+            navigation_start = perf_counter()
+            navigation_guide_obj = _navigation_guide().generate_navigation_guide(objects_with_depth)
+            navigation_time = perf_counter() - navigation_start
             execution_time.navigation_generation = navigation_time
         else:
-            # Create default NavigationGuide object if no objects detected
-            navigation_guide_obj = NavigationGuide(
-                navigation_text="No objects detected, the path ahead is clear.",
-                priority_objects=[]
-            )
+            # Default NavigationGuide when no objects were detected
+            navigation_guide_obj = _EMPTY_NAVIGATION_GUIDE
             execution_time.navigation_generation = 0.0
         
         # Perform text-to-speech
-        tts_start = datetime.now()
-        audio_data = await tts_handler.convert_text_to_speech(
+        tts_start = perf_counter()
+        audio_data = await _tts_handler().convert_text_to_speech(
             navigation_guide_obj.navigation_text,
             folder_name,
             str(frame_idx),
             tts_engine
         )
-        tts_time = (datetime.now() - tts_start).total_seconds()
+        tts_time = perf_counter() - tts_start
         execution_time.text_to_speech = tts_time
         
-        # Calculate total processing time
-        execution_time.total = sum([
-            execution_time.object_detection,
-            execution_time.depth_estimation or 0.0,
-            execution_time.navigation_generation or 0.0,
-            execution_time.text_to_speech
-        ])
+        # Total is the wall-clock span, so glue between stages counts too
+        execution_time.total = perf_counter() - frame_start
+        if predetected:
+            execution_time.total += detection_time
         
         # Create FrameAnalysis object
         frame_analysis = FrameAnalysis(
@@ -227,7 +301,7 @@ class VideoHandler:
                 return {"error": f"Folder '{folder_name}' not found"}
     
             # Get total frames in folder
-            frame_files = sorted([f for f in os.listdir(frames_folder) if f.startswith('frame_')])
+            frame_files = list_frame_files(frames_folder)
             total_frames = len(frame_files)
             
             # Validate frame range
@@ -237,46 +311,88 @@ class VideoHandler:
             
             # Select frames to process
             frame_indices = list(range(start_frame, min(end_frame + 1, total_frames)))
+
+            # Build all frame paths once instead of joining inside each task
+            frame_paths = [os.path.join(frames_folder, name) for name in frame_files]
             
             # Process frames in parallel with concurrency control
-            total_start_time = datetime.now()
-            
-            # Limit concurrency to avoid overwhelming system resources
-            concurrency_limit = CONCURRENCY_LIMIT
-            semaphore = Semaphore(concurrency_limit)
+            total_start_time = perf_counter()
             
+            # Limit concurrency to avoid overwhelming system resources;
+            # overridable per deployment without a code change
+            concurrency_limit = int(os.getenv("FRAME_CONCURRENCY", CONCURRENCY_LIMIT))
+
             # Collection for execution times
             execution_times = []
-            
+
             frames_analysis = []
+            audio_by_index = {}
+
+            # Two-stage pipeline over a bounded queue: a detection
+            # producer feeds per-frame work to a pool of consumers that
+            # run depth, guidance and TTS, so downstream stages start on
+            # the first batch while later batches are still detecting.
+            # The bound keeps detection from racing far ahead of the
+            # slower network-bound stages
+            work_queue = Queue(maxsize=concurrency_limit * 2)
 
-            async def process_with_semaphore(idx):
+            async def detection_producer():
                 try:
-                    async with semaphore:
-                        frame_path = os.path.join(frames_folder, frame_files[idx])
+                    for batch_start in range(0, len(frame_indices), DETECTION_BATCH):
+                        batch_indices = frame_indices[batch_start:batch_start + DETECTION_BATCH]
+                        batch_paths = [frame_paths[idx] for idx in batch_indices]
+
+                        # A bad frame must not take down the range, so a
+                        # failed batch degrades to empty detections and the
+                        # remaining batches keep flowing
+                        detection_start = perf_counter()
+                        try:
+                            batch_objects = await _object_detector().detect_objects_batch(batch_paths)
+                        except Exception as e:
+                            logger.error(f"Error detecting batch starting at frame {batch_indices[0]}: {str(e)}")
+                            batch_objects = [[] for _ in batch_indices]
+                        detection_time = (perf_counter() - detection_start) / len(batch_indices)
+
+                        for idx, objects in zip(batch_indices, batch_objects):
+                            await work_queue.put((idx, objects, detection_time))
+                finally:
+                    # One sentinel per worker signals the end of the stream;
+                    # queued even on failure so no worker parks forever
+                    for _ in range(concurrency_limit):
+                        await work_queue.put(None)
+
+            async def frame_worker():
+                while (item := await work_queue.get()) is not None:
+                    idx, objects, detection_time = item
+                    try:
                         # Process frame and get full analysis
-                        frame_analysis = await self.process_frame(folder_name, idx, frame_path, tts_engine)
-                        
+                        frame_analysis = await self.process_frame(
+                            folder_name, idx, frame_paths[idx], tts_engine,
+                            objects=objects, detection_time=detection_time
+                        )
+
                         if frame_analysis is None or frame_analysis.audio is None:
                             logger.warning(f"Frame {idx} processing returned None")
-                            return None
-                            
+                            continue
+
                         # Store execution time
                         execution_times.append(frame_analysis.execution_time)
                         frames_analysis.append(frame_analysis)
-                        
+
                         # Log the detailed analysis
                         logger.info(f"Frame {idx} analysis: Objects detected: {len(frame_analysis.objects)}")
                         logger.info(f"Frame {idx} navigation: {frame_analysis.navigation.navigation_text}")
-                        
-                        return frame_analysis.audio
-                except Exception as e:
-                    logger.error(f"Error processing frame {idx}: {str(e)}")
-                    return None
-
-            # Process frames in parallel
-            tasks = [process_with_semaphore(idx) for idx in frame_indices]
-            audio_responses = await gather(*tasks)
+
+                        audio_by_index[idx] = frame_analysis.audio
+                    except Exception as e:
+                        logger.error(f"Error processing frame {idx}: {str(e)}")
+
+            await gather(detection_producer(), *(frame_worker() for _ in range(concurrency_limit)))
+
+            audio_responses = [audio_by_index.get(idx) for idx in frame_indices]
+
+            # Tasks append as they complete, so restore frame order
+            frames_analysis.sort(key=lambda analysis: int(analysis.frame_index))
             
             # Count successful vs failed frames
             successful_frames = len([r for r in audio_responses if r is not None])
@@ -286,7 +402,7 @@ class VideoHandler:
             if successful_frames == 0:
                 raise Exception("All frames failed to process")
 
-            total_execution_time = (datetime.now() - total_start_time).total_seconds()
+            total_execution_time = perf_counter() - total_start_time
             logger.info(f"Total processing time: {total_execution_time:.2f} seconds for frames {start_frame} to {end_frame}")
             
             # Filter out None values (in case some frames didn't generate audio)
@@ -333,7 +449,7 @@ class VideoHandler:
                 return {"error": f"Folder '{folder_name}' not found"}
     
             # Get frames in folder
-            frame_files = sorted([f for f in os.listdir(frames_folder) if f.startswith('frame_')])
+            frame_files = list_frame_files(frames_folder)
             total_frames = len(frame_files)
             
             # Validate frame index
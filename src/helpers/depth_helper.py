@@ -1,116 +1,210 @@
-from transformers import pipeline
-from PIL import Image
-import numpy as np
-import json
-from typing import List
-from src.utils.logger import logger
-from src.schemas.detection import DetectedObject
-from src.schemas.depth import ObjectWithDepth
-
-def predict(depth_model, objects: List[DetectedObject], image_path: str) -> List[ObjectWithDepth]:
-    """
-    Estimate depth for detected objects
-    
-    Args:
-        depth_model: The depth estimation model
-        objects (List[DetectedObject]): List of detected objects
-        image_path (str): Path to image file
-        
-    Returns:
-        List[ObjectWithDepth]: Objects with depth information
-    """
-    try:
-        # Load and process image
-        image = Image.open(image_path)
-        depth_map = np.array(depth_model(image)['depth'])
-        
-        # Get depth for each object
-        results = _get_object_depths(depth_map, objects)
-        
-        return results
-        
-    except Exception as e:
-        logger.error(f"Error in depth estimation: {str(e)}")
-        return []
-
-def _get_object_depths(depth_map: np.ndarray, objects: List[DetectedObject]) -> List[ObjectWithDepth]:
-    """
-    Calculate depth for each object using the depth map
-    
-    Args:
-        depth_map (np.ndarray): Generated depth map
-        objects (List[DetectedObject]): List of detected objects
-        
-    Returns:
-        List[ObjectWithDepth]: Objects with calculated depths
-    """
-    try:
-        # Get depth map dimensions
-        height, width = depth_map.shape
-        
-        # Normalize depth map to [0,1]
-        depth_map = (depth_map - depth_map.min()) / (depth_map.max() - depth_map.min())
-        
-        results = []
-        for obj in objects:
-            try:
-                # Get coordinates
-                y1, x1, y2, x2 = obj.box_2d
-                
-                # Convert to pixels
-                x1_pixel = int(x1 * width / 1000)
-                y1_pixel = int(y1 * height / 1000)
-                x2_pixel = int(x2 * width / 1000)
-                y2_pixel = int(y2 * height / 1000)
-                
-                # Ensure coordinates are within image
-                x1_pixel = max(0, min(x1_pixel, width-1))
-                y1_pixel = max(0, min(y1_pixel, height-1))
-                x2_pixel = max(0, min(x2_pixel, width-1))
-                y2_pixel = max(0, min(y2_pixel, height-1))
-                
-                # Calculate depth
-                depth_region = depth_map[y1_pixel:y2_pixel, x1_pixel:x2_pixel]
-                depth_mean = float(np.mean(depth_region))
-                
-                # Create ObjectWithDepth instance
-                result = ObjectWithDepth(
-                    box_2d=obj.box_2d,
-                    label=obj.label,
-                    position=obj.position,
-                    type=obj.type,
-                    depth=depth_mean,
-                    distance_rank=0  # Will be set after sorting
-                )
-                results.append(result)
-                
-            except Exception as e:
-                logger.error(f"Error processing object {obj.label}: {str(e)}")
-                # Create ObjectWithDepth with NaN depth
-                result = ObjectWithDepth(
-                    box_2d=obj.box_2d,
-                    label=obj.label,
-                    position=obj.position,
-                    type=obj.type,
-                    depth=float('nan'),
-                    distance_rank=0  # Will be set after sorting
-                )
-                results.append(result)
-        
-        # Sort by depth
-        valid_results = [r for r in results if not np.isnan(r.depth)]
-        invalid_results = [r for r in results if np.isnan(r.depth)]
-        
-        # Sort valid results by depth (nearest first)
-        valid_results.sort(key=lambda x: x.depth)
-        
-        # Combine results and add ranks
-        final_results = valid_results + invalid_results
-        for i, result in enumerate(final_results):
-            result.distance_rank = i + 1
-        
-        return final_results
-        
-    except Exception as e:
-        logger.error(f"Error in depth calculation: {str(e)}")
+from transformers import pipeline
+from PIL import Image
+from collections import OrderedDict
+import numpy as np
+import threading
+import torch
+import json
+import os
+from typing import List
+from src.helpers.video_helper import load_frame_image
+from src.utils.logger import logger
+from src.utils.constant import DEPTH_MAP_CACHE_SIZE, DEPTH_BATCH_SIZE
+from src.schemas.detection import DetectedObject
+from src.schemas.depth import ObjectWithDepth
+
+# LRU cache of raw depth maps keyed by (image_path, mtime) so repeated
+# calls on the same frame skip the model forward pass entirely
+_depth_map_cache: OrderedDict = OrderedDict()
+
+# One forward pass on the device at a time, whichever path invokes it:
+# batched flushes, single-frame predicts and warm-ups all run on worker
+# threads, and the compiled model's CUDA-graph replay is not reentrant
+_model_lock = threading.Lock()
+
+def _output_to_depth_map(output) -> np.ndarray:
+    """
+    Extract a float depth map from a pipeline output
+
+    Reads the raw predicted_depth tensor instead of the post-processed
+    'depth' PIL image, skipping the interpolate-to-input-size and image
+    conversion steps; box coordinates are normalized, so the map's
+    resolution does not matter to the samplers.
+    """
+    predicted = output.get('predicted_depth')
+    if predicted is not None:
+        return predicted.squeeze().detach().to(dtype=torch.float32).cpu().numpy()
+    return np.array(output['depth'], dtype=np.float32)
+
+def compute_depth_map(depth_model, image_path: str, image: Image.Image = None) -> np.ndarray:
+    """
+    Run the depth model on an image, caching the resulting depth map.
+
+    The cache key includes the file's mtime so a rewritten frame
+    invalidates its stale entry automatically.
+
+    Args:
+        depth_model: The depth estimation model
+        image_path (str): Path to image file
+        image (Image.Image, optional): Already-decoded image for the path;
+            skips re-decoding the file on a cache miss
+
+    Returns:
+        np.ndarray: Raw depth map for the image
+    """
+    key = (image_path, os.path.getmtime(image_path))
+    depth_map = _depth_map_cache.get(key)
+    if depth_map is not None:
+        _depth_map_cache.move_to_end(key)
+        return depth_map
+
+    if image is None:
+        image = load_frame_image(image_path)
+    # inference_mode also skips version-counter bookkeeping that
+    # no_grad (the pipeline default) still pays for
+    with _model_lock, torch.inference_mode():
+        depth_map = _output_to_depth_map(depth_model(image))
+
+    _depth_map_cache[key] = depth_map
+    if len(_depth_map_cache) > DEPTH_MAP_CACHE_SIZE:
+        _depth_map_cache.popitem(last=False)
+
+    return depth_map
+
+def predict(depth_model, objects: List[DetectedObject], image_path: str, image: Image.Image = None) -> List[ObjectWithDepth]:
+    """
+    Estimate depth for detected objects
+
+    Args:
+        depth_model: The depth estimation model
+        objects (List[DetectedObject]): List of detected objects
+        image_path (str): Path to image file
+        image (Image.Image, optional): Already-decoded image for the path
+
+    Returns:
+        List[ObjectWithDepth]: Objects with depth information
+    """
+    try:
+        # Compute (or fetch the cached) depth map for this frame
+        depth_map = compute_depth_map(depth_model, image_path, image=image)
+
+        # Get depth for each object
+        results = _get_object_depths(depth_map, objects)
+
+        return results
+
+    except Exception as e:
+        logger.error(f"Error in depth estimation: {str(e)}")
+        return []
+
+def predict_batch(depth_model, objects_list: List[List[DetectedObject]], image_paths: List[str], images: List[Image.Image] = None) -> List[List[ObjectWithDepth]]:
+    """
+    Estimate depth for detected objects across several frames in one
+    model invocation instead of one forward pass per frame
+
+    Args:
+        depth_model: The depth estimation model
+        objects_list (List[List[DetectedObject]]): Detected objects per frame
+        image_paths (List[str]): Paths to the image files, aligned with objects_list
+        images (List[Image.Image], optional): Already-decoded images,
+            aligned with image_paths; None entries are read from disk
+
+    Returns:
+        List[List[ObjectWithDepth]]: Objects with depth information per frame
+    """
+    try:
+        # Reuse decoded images where callers provide them, read the rest,
+        # and run the model once on the whole batch; the explicit
+        # batch_size makes the pipeline stack them into batched tensors
+        # instead of iterating one by one
+        if images is None:
+            images = [None] * len(image_paths)
+        images = [
+            image if image is not None else load_frame_image(path)
+            for image, path in zip(images, image_paths)
+        ]
+        with _model_lock, torch.inference_mode():
+            outputs = depth_model(images, batch_size=DEPTH_BATCH_SIZE)
+
+        # Sample per-object depths from each frame's depth map
+        results = []
+        for objects, output in zip(objects_list, outputs):
+            results.append(_get_object_depths(_output_to_depth_map(output), objects))
+
+        return results
+
+    except Exception as e:
+        logger.error(f"Error in batched depth estimation: {str(e)}")
+        return [[] for _ in image_paths]
+
+def _get_object_depths(depth_map: np.ndarray, objects: List[DetectedObject]) -> List[ObjectWithDepth]:
+    """
+    Calculate depth for each object using the depth map
+    
+    Args:
+        depth_map (np.ndarray): Generated depth map
+        objects (List[DetectedObject]): List of detected objects
+        
+    Returns:
+        List[ObjectWithDepth]: Objects with calculated depths
+    """
+    try:
+        if not objects:
+            return []
+
+        # Get depth map dimensions
+        height, width = depth_map.shape
+
+        # The [0,1] normalization is affine and the box mean is linear,
+        # so sample raw means and normalize them per box afterwards,
+        # skipping a full-map normalized copy (one H*W read+write saved)
+        depth_min = float(depth_map.min())
+        depth_range = float(depth_map.max()) - depth_min
+
+        # Convert all normalized boxes to clipped pixel coordinates in one
+        # vectorized pass instead of per-object scalar arithmetic
+        boxes = np.array([obj.box_2d for obj in objects], dtype=np.float64)
+        boxes *= np.array([height, width, height, width]) / 1000.0
+        pixel_boxes = boxes.astype(np.int64)
+        np.clip(pixel_boxes[:, 0::2], 0, height - 1, out=pixel_boxes[:, 0::2])
+        np.clip(pixel_boxes[:, 1::2], 0, width - 1, out=pixel_boxes[:, 1::2])
+
+        # Integral image over the raw map turns each box mean into four
+        # corner lookups, replacing a per-object region slice and reduction
+        integral = np.pad(depth_map, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+        y1, x1, y2, x2 = pixel_boxes.T
+        areas = (y2 - y1) * (x2 - x1)
+        box_sums = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+        # Zero-area boxes keep the NaN depth the old empty-slice mean gave
+        raw_means = np.where(areas > 0, box_sums / np.maximum(areas, 1), np.nan)
+        depth_means = (raw_means - depth_min) / depth_range
+
+        results = [
+            ObjectWithDepth(
+                box_2d=obj.box_2d,
+                label=obj.label,
+                position=obj.position,
+                type=obj.type,
+                depth=float(depth_mean),
+                distance_rank=0  # Will be set after sorting
+            )
+            for obj, depth_mean in zip(objects, depth_means)
+        ]
+        
+        # Sort by depth
+        valid_results = [r for r in results if not np.isnan(r.depth)]
+        invalid_results = [r for r in results if np.isnan(r.depth)]
+        
+        # Sort valid results by depth (nearest first)
+        valid_results.sort(key=lambda x: x.depth)
+        
+        # Combine results and add ranks
+        final_results = valid_results + invalid_results
+        for i, result in enumerate(final_results):
+            result.distance_rank = i + 1
+        
+        return final_results
+        
+    except Exception as e:
+        logger.error(f"Error in depth calculation: {str(e)}")
         return [] 
\ No newline at end of file
@@ -1,41 +1,35 @@
-from typing import List
+from typing import List, Tuple
+from bisect import bisect_left
+
+import numpy as np
 
 from src.utils.logger import logger
 from src.schemas import ObjectWithDepth
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from src.utils.constant import (
     PRIORITY_DEPTH_WEIGHT, PRIORITY_POSITION_WEIGHT, PRIORITY_SIZE_WEIGHT, PRIORITY_TYPE_WEIGHT,
     DISTANCE_CLOSE_THRESHOLD, DISTANCE_MEDIUM_THRESHOLD,
     FRAME_NORMALIZED_WIDTH, FRAME_NORMALIZED_AREA,
-    HIGH_RISK_OBJECTS, MEDIUM_RISK_OBJECTS, LOW_RISK_OBJECTS, MINIMAL_RISK_OBJECTS
+    HIGH_RISK_OBJECTS, MEDIUM_RISK_OBJECTS, LOW_RISK_OBJECTS, MINIMAL_RISK_OBJECTS,
+    EXCLUDED_TYPES, WARNING_HIGH_THRESHOLD, WARNING_MEDIUM_THRESHOLD,
+    GUIDANCE_CACHE_SIZE
 )
 
+# Type score lookup built once at import, replacing a chain of list
+# membership scans on every call
+TYPE_SCORE_TABLE = {
+    **{t: 1.0 for t in HIGH_RISK_OBJECTS},      # High risk - highest priority
+    **{t: 0.7 for t in MEDIUM_RISK_OBJECTS},    # Medium risk
+    **{t: 0.4 for t in LOW_RISK_OBJECTS},       # Low risk
+    **{t: 0.2 for t in MINIMAL_RISK_OBJECTS},   # Static objects, minimal risk
+    # Không ưu tiên các đối tượng không liên quan đến điều hướng
+    **dict.fromkeys(EXCLUDED_TYPES, 0.0),
+}
+
 def get_type_score(obj_type: str) -> float:
     """Calculate priority score based on object type"""
-    obj_type = obj_type.lower()
-    
-    # Không ưu tiên các đối tượng không liên quan đến điều hướng
-    if obj_type in ['geographical feature', 'atmospheric', 'body of water']:
-        return 0.0
-    
-    # High risk - highest priority
-    if obj_type in HIGH_RISK_OBJECTS:
-        return 1.0
-        
-    # Medium risk
-    if obj_type in MEDIUM_RISK_OBJECTS:
-        return 0.7
-        
-    # Low risk
-    if obj_type in LOW_RISK_OBJECTS:
-        return 0.4
-        
-    # Static objects, minimal risk
-    if obj_type in MINIMAL_RISK_OBJECTS:
-        return 0.2
-        
-    # Default for undefined objects
-    return 0.1
+    # Default of 0.1 for undefined objects
+    return TYPE_SCORE_TABLE.get(obj_type.lower(), 0.1)
 
 def get_priority_score(obj: ObjectWithDepth) -> float:
     """
@@ -48,42 +42,106 @@ def get_priority_score(obj: ObjectWithDepth) -> float:
         float: Priority score (0-1)
     """
     try:
-        # Get depth score (already 0-1)
-        depth_score = obj.depth
-        
-        # Calculate position score
-        y_min, x_min, y_max, x_max = obj.box_2d
-        
-        # Calculate center point (by x)
-        x_center = (x_min + x_max) / 2
-        frame_width = FRAME_NORMALIZED_WIDTH
-        frame_center = frame_width / 2
-        position_score = abs(x_center - frame_center) / frame_width
-        
-        # Calculate size score
-        width = x_max - x_min
-        height = y_max - y_min
-        size_score = (width * height) / FRAME_NORMALIZED_AREA
-        
-        # Calculate type score
-        type_score = get_type_score(obj.type)
-        
-        # Define weights
-        w1 = PRIORITY_DEPTH_WEIGHT
-        w2 = PRIORITY_POSITION_WEIGHT
-        w3 = PRIORITY_SIZE_WEIGHT
-        w4 = PRIORITY_TYPE_WEIGHT
-        
-        # Calculate priority score
-        priority_score = (w1 * depth_score) + (w2 * (1 - position_score)) + \
-                       (w3 * size_score) + (w4 * type_score)
-        
-        return priority_score
-        
+        # Delegate to the shared kernel so the formula lives in one place
+        return float(_compute_priority_scores([obj])[0])
+
     except Exception as e:
         logger.error(f"Error calculating priority score: {str(e)}")
         return 0.0
 
+def make_score_scratch(capacity: int) -> tuple:
+    """Preallocate reusable buffers for _compute_priority_scores"""
+    return (
+        np.empty((capacity, 4), dtype=np.float64),
+        np.empty(capacity, dtype=np.float64),
+        np.empty(capacity, dtype=np.float64),
+    )
+
+def _compute_priority_scores(objects: List[ObjectWithDepth], scratch: tuple = None) -> np.ndarray:
+    """
+    Compute priority scores for all objects in one vectorized pass
+
+    Args:
+        objects (List[ObjectWithDepth]): List of objects with depth information
+        scratch (tuple, optional): Buffers from make_score_scratch, reused
+            across calls to avoid per-frame allocations
+
+    Returns:
+        np.ndarray: Priority score per object, aligned with the input list
+    """
+    count = len(objects)
+    if scratch is not None and count <= scratch[1].shape[0]:
+        boxes, depths, type_scores = (buf[:count] for buf in scratch)
+        for i, obj in enumerate(objects):
+            boxes[i] = obj.box_2d
+            depths[i] = obj.depth
+            type_scores[i] = get_type_score(obj.type)
+    else:
+        boxes = np.array([obj.box_2d for obj in objects], dtype=np.float64)
+        depths = np.fromiter((obj.depth for obj in objects), dtype=np.float64, count=count)
+        type_scores = np.fromiter((get_type_score(obj.type) for obj in objects), dtype=np.float64, count=count)
+
+    # Position score: distance of the box center from the frame center
+    x_center = (boxes[:, 1] + boxes[:, 3]) / 2
+    position_scores = np.abs(x_center - FRAME_NORMALIZED_WIDTH / 2) / FRAME_NORMALIZED_WIDTH
+
+    # Size score: relative area of the box
+    size_scores = (boxes[:, 3] - boxes[:, 1]) * (boxes[:, 2] - boxes[:, 0]) / FRAME_NORMALIZED_AREA
+
+    return (PRIORITY_DEPTH_WEIGHT * depths
+            + PRIORITY_POSITION_WEIGHT * (1 - position_scores)
+            + PRIORITY_SIZE_WEIGHT * size_scores
+            + PRIORITY_TYPE_WEIGHT * type_scores)
+
+def _classify_scores(scores: np.ndarray) -> List[str]:
+    """Map priority scores to High/Medium/None warning levels"""
+    warning_levels = np.select(
+        [scores > WARNING_HIGH_THRESHOLD, scores > WARNING_MEDIUM_THRESHOLD],
+        ["High", "Medium"],
+        default="None"
+    )
+    return warning_levels.tolist()
+
+def top_scored_objects(objects: List[ObjectWithDepth], count: int = 3, scratch: tuple = None) -> Tuple[List[ObjectWithDepth], np.ndarray, List[str]]:
+    """
+    Score every object once and return the highest-priority ones with
+    their scores and warning levels
+
+    Fuses the selection and classification passes: the vectorized kernel
+    runs a single time over the full list, the top entries are picked
+    from those scores, and the same scores feed the warning levels, so
+    nothing is re-scored downstream.
+
+    Args:
+        objects (List[ObjectWithDepth]): List of objects with depth information
+        count (int): Number of objects to keep
+        scratch (tuple, optional): Buffers from make_score_scratch
+
+    Returns:
+        Tuple[List[ObjectWithDepth], np.ndarray, List[str]]: The count
+            highest-priority objects (highest first), their priority
+            scores, and their warning levels, all aligned
+    """
+    try:
+        if not objects:
+            return [], np.empty(0), []
+
+        scores = _compute_priority_scores(objects, scratch=scratch)
+        if len(objects) > count:
+            # argpartition bounds the selection, argsort orders the winners
+            top_indices = np.argpartition(scores, -count)[-count:]
+            top_indices = top_indices[np.argsort(-scores[top_indices], kind="stable")]
+        else:
+            top_indices = np.argsort(-scores, kind="stable")
+
+        top_scores = scores[top_indices]
+        return [objects[i] for i in top_indices], top_scores, _classify_scores(top_scores)
+
+    except Exception as e:
+        logger.error(f"Error selecting top priority objects: {str(e)}")
+        fallback = objects[:count]
+        return fallback, np.zeros(len(fallback)), ["None"] * len(fallback)
+
 def sort_objects_by_priority(objects: List[ObjectWithDepth]) -> List[ObjectWithDepth]:
     """
     Sort objects list by priority using Priority Score method
@@ -107,15 +165,25 @@ def sort_objects_by_priority(objects: List[ObjectWithDepth]) -> List[ObjectWithD
         List[ObjectWithDepth]: Sorted list of objects
     """
     try:
-        # Sort objects by priority score in descending order
-        sorted_objects = sorted(objects, key=get_priority_score, reverse=True)
-        
-        return sorted_objects
-        
+        if not objects:
+            return []
+
+        # Score every object in one vectorized pass and order by the
+        # negated scores; the stable argsort keeps ties in input order,
+        # matching the previous sorted(reverse=True) behavior
+        scores = _compute_priority_scores(objects)
+        order = np.argsort(-scores, kind="stable")
+
+        return [objects[i] for i in order]
+
     except Exception as e:
         logger.error(f"Error sorting objects by priority: {str(e)}")
         return objects
 
+# Ascending depth boundaries with their distance descriptions
+_DISTANCE_BOUNDARIES = (DISTANCE_MEDIUM_THRESHOLD, DISTANCE_CLOSE_THRESHOLD)
+_DISTANCE_LABELS = ("far away", "quite close", "very close")
+
 def convert_depth_to_distance_text(depth: float) -> str:
     """
     Convert depth value to distance description based on Priority Score thresholds
@@ -126,12 +194,8 @@ def convert_depth_to_distance_text(depth: float) -> str:
     Returns:
         str: Distance description
     """
-    if depth > DISTANCE_CLOSE_THRESHOLD:
-        return "very close"
-    elif depth > DISTANCE_MEDIUM_THRESHOLD:
-        return "quite close"
-    else:
-        return "far away"
+    # bisect_left keeps the strict-greater-than threshold semantics
+    return _DISTANCE_LABELS[bisect_left(_DISTANCE_BOUNDARIES, depth)]
 
 def should_add_warning(warning_levels: List[str]) -> bool:
     """
@@ -146,20 +210,42 @@ def should_add_warning(warning_levels: List[str]) -> bool:
     # Add warning if any object has "High" warning level
     return "High" in warning_levels
 
+# Guidance text memoized by scene signature: consecutive frames often
+# show the same objects at the same coarse distances, so the sentence
+# assembly below runs once per distinct scene instead of per frame
+_guidance_cache: OrderedDict = OrderedDict()
+
+def _guidance_cache_key(important_objects: List[ObjectWithDepth], warning_levels: List[str]) -> tuple:
+    """Scene signature at the granularity the guidance text resolves"""
+    return (
+        should_add_warning(warning_levels),
+        tuple(
+            (obj.label, obj.position, convert_depth_to_distance_text(obj.depth))
+            for obj in important_objects
+        ),
+    )
+
 def generate_optimized_guidance(important_objects: List[ObjectWithDepth], warning_levels: List[str]) -> str:
     """
     Generate optimized guidance text by combining all objects into a single concise sentence
-    
+
     Args:
         important_objects (List[ObjectWithDepth]): List of priority objects
         warning_levels (List[str]): Warning levels for each object
-        
+
     Returns:
         str: Optimized guidance text as a single sentence
     """
     if not important_objects:
         return "No objects detected, the path ahead is clear."
-        
+
+    # Reuse the sentence for scenes that only differ within a distance bucket
+    key = _guidance_cache_key(important_objects, warning_levels)
+    cached = _guidance_cache.get(key)
+    if cached is not None:
+        _guidance_cache.move_to_end(key)
+        return cached
+
     # Group objects by position and label
     position_objects = defaultdict(lambda: defaultdict(int))
     position_depth = defaultdict(lambda: defaultdict(list))
@@ -223,8 +309,13 @@ def generate_optimized_guidance(important_objects: List[ObjectWithDepth], warnin
         sentence_parts.append(f"There are {positions_text[0]} and {positions_text[1]}.")
     else:
         sentence_parts.append(f"There are {', '.join(positions_text[:-1])}, and {positions_text[-1]}.")
-    
-    return " ".join(sentence_parts)
+
+    guidance_text = " ".join(sentence_parts)
+    _guidance_cache[key] = guidance_text
+    if len(_guidance_cache) > GUIDANCE_CACHE_SIZE:
+        _guidance_cache.popitem(last=False)
+
+    return guidance_text
 
 def calculate_object_size(box_2d):
     """
@@ -1,28 +1,69 @@
 import asyncio
-import soundfile as sf
 import io
+import struct
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from src.utils.logger import logger
-from src.utils.constant import AUDIO_SAMPLE_RATE, AUDIO_FORMAT
+from src.utils.constant import AUDIO_SAMPLE_RATE
+
+# Kokoro's pipeline is stateful and not thread-safe, so a dedicated
+# single worker serializes synthesis while keeping it off the event loop
+_kokoro_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kokoro")
+
+def _pcm_to_wav_bytes(samples: np.ndarray, sample_rate: int) -> bytes:
+    """
+    Pack mono float samples into a WAV container
+
+    A struct-packed 44-byte header plus the int16 PCM body replaces the
+    soundfile round trip through a BytesIO buffer.
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + len(pcm), b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', len(pcm)
+    )
+    return header + pcm
+
+def _parse_wav_byte_rate(header: bytes):
+    """Pull the byte rate out of a standard 44-byte WAV header"""
+    if len(header) >= 32 and header[:4] == b'RIFF' and header[8:12] == b'WAVE' and header[12:16] == b'fmt ':
+        return struct.unpack_from('<I', header, 28)[0]
+    return None
 
 # Module imports for different TTS engines
 async def call_openai_api(openai_client, model, voice, text):
-    """Use OpenAI API for text-to-speech conversion"""
+    """
+    Use OpenAI API for text-to-speech conversion
+
+    Returns:
+        tuple: (audio_bytes, duration) — duration is derived from the
+            byte rate in the first streamed chunk plus the body length,
+            so nothing re-scans the payload afterwards
+    """
     try:
-        response = await asyncio.to_thread(
-            openai_client.audio.speech.create,
+        # Stream the body in chunks as it is generated instead of
+        # waiting for the full payload before the first read; the
+        # route returns raw bytes, so accumulate into one buffer
+        buffer = bytearray()
+        byte_rate = None
+        async with openai_client.audio.speech.with_streaming_response.create(
             model=model,
             voice=voice,
             input=text,
             response_format="wav"
-        )
-        
-        # Get bytes from response
-        audio_bytes = await asyncio.to_thread(lambda: response.read())
-        return audio_bytes
+        ) as response:
+            async for chunk in response.iter_bytes():
+                if not buffer:
+                    byte_rate = _parse_wav_byte_rate(chunk)
+                buffer.extend(chunk)
+
+        duration = (len(buffer) - 44) / byte_rate if byte_rate else None
+        return bytes(buffer), duration
     except Exception as e:
         logger.error(f"Error in OpenAI TTS: {str(e)}")
-        return None
+        return None, None
 
 async def call_gtts(language, text, agtts_engine=None):
     """Use aiogTTS (async Google Text-to-Speech) for conversion"""
@@ -47,30 +88,38 @@ async def call_gtts(language, text, agtts_engine=None):
         logger.error(f"Error in aiogTTS: {str(e)}")
         return None
 
+def _sync_kokoro(voice, speed, text, pipeline):
+    """Blocking Kokoro synthesis; runs on the dedicated worker thread"""
+    # Create generator
+    generator = pipeline(
+        text=text,
+        voice=voice,
+        speed=speed
+    )
+
+    # Process results from generator
+    for i, (gs, ps, audio) in enumerate(generator):
+        # Only take the first audio
+        samples = np.asarray(audio, dtype=np.float32)
+        duration = len(samples) / AUDIO_SAMPLE_RATE
+        return _pcm_to_wav_bytes(samples, AUDIO_SAMPLE_RATE), duration
+
+    return None, None
+
 async def call_kokoro(voice, speed, text, kokoro_pipeline=None):
-    """Use Kokoro TTS library for conversion"""
+    """
+    Use Kokoro TTS library for conversion
+
+    Returns:
+        tuple: (audio_bytes, duration) — duration comes from the sample
+            count, so callers can skip re-parsing the WAV container
+    """
     try:
-        # Use provided pipeline or create new one
-        pipeline = kokoro_pipeline
-        
-        # Create generator
-        generator = pipeline(
-            text=text,
-            voice=voice,
-            speed=speed
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _kokoro_executor, _sync_kokoro, voice, speed, text, kokoro_pipeline
         )
-        
-        # Process results from generator
-        for i, (gs, ps, audio) in enumerate(generator):
-            # Only take the first audio
-            # Convert numpy array to bytes
-            audio_bytes = io.BytesIO()
-            sf.write(audio_bytes, audio, AUDIO_SAMPLE_RATE, format=AUDIO_FORMAT)
-            audio_bytes.seek(0)
-            return audio_bytes.read()
-            
-        return None
     except Exception as e:
         logger.error(f"Error in Kokoro TTS: {str(e)}")
-        return None
+        return None, None
 
@@ -1,31 +1,221 @@
 import cv2
+import numpy as np
+from PIL import Image
 from datetime import timedelta, datetime
+from functools import lru_cache
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import aiofiles
 import asyncio
+import orjson
 import os
+import threading
+import zipfile
 from src.utils.logger import logger
-from src.utils.constant import ALLOWED_EXTENSIONS
+from src.utils.constant import ALLOWED_EXTENSIONS, FRAME_DEDUPE_HAMMING_THRESHOLD
 from src.schemas import VideoFrame
 
+# torchcodec enables GPU-accelerated (NVDEC) decoding of only the frames we
+# keep, instead of CPU-decoding every frame and discarding most of them.
+# It is optional - we fall back to the OpenCV loop when unavailable. The
+# broad except matters: a torch version mismatch or missing FFmpeg shared
+# libraries surfaces as RuntimeError from the native loader, not
+# ImportError, and must not take the whole API down at import time.
+try:
+    import torch
+    from torchcodec.decoders import VideoDecoder
+    _TORCHCODEC_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"torchcodec unavailable, using OpenCV decode: {str(e)}")
+    _TORCHCODEC_AVAILABLE = False
+
+# JPEG encode parameters for saved frames - skip the slow optimize pass
+_JPEG_WRITE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+
+def load_frame_image(frame_path: str) -> Image.Image:
+    """
+    Decode a frame image eagerly, shared by the detection and depth paths.
+
+    OpenCV links libjpeg-turbo, decoding JPEG frames roughly twice as
+    fast as PIL; the result is wrapped in a PIL image so consumers are
+    unaffected. Falls back to an eager PIL load for anything OpenCV
+    cannot read. Decoding happens here, not lazily at first use, so
+    callers can run this in a worker thread and keep the event loop free.
+
+    Args:
+        frame_path (str): Path to the frame image
+
+    Returns:
+        Image.Image: Decoded RGB image
+    """
+    bgr = cv2.imread(frame_path, cv2.IMREAD_COLOR)
+    if bgr is None:
+        image = Image.open(frame_path)
+        image.load()
+        return image
+    return Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+
+def _decode_frames_gpu(video_path, time_interval) -> list:
+    """
+    Decode one frame per time interval on the GPU using torchcodec/NVDEC.
+
+    Only the target frame indices are decoded, so the host never pays for
+    the frames that would be discarded by the sampling loop.
+
+    Args:
+        video_path: Path to the video file
+        time_interval (int): Interval between sampled frames in seconds
+
+    Returns:
+        list: List of (seconds, frame) tuples with BGR numpy frames
+    """
+    decoder = VideoDecoder(
+        str(video_path),
+        device="cuda",
+        seek_mode="approximate",
+        num_ffmpeg_threads=1
+    )
+    metadata = decoder.metadata
+    fps = metadata.average_fps
+    duration = metadata.duration_seconds
+
+    # One frame per time_interval seconds
+    seconds = list(range(0, int(duration), time_interval))
+    indices = [int(fps * s) for s in seconds]
+
+    # Batch-decode the needed frames and copy them to the CPU once
+    batch = decoder.get_frames_at(indices=indices).data.to("cpu").numpy()
+
+    frames = []
+    for current_time, frame in zip(seconds, batch):
+        # Convert CHW RGB tensor layout to HWC BGR for OpenCV
+        frame = frame.transpose(1, 2, 0)[:, :, ::-1].copy()
+        frames.append((current_time, frame))
+
+    return frames
+
+def _decode_frames_cpu(video_path, time_interval) -> list:
+    """
+    Decode one frame per time interval with the OpenCV CPU decoder.
+
+    Args:
+        video_path: Path to the video file
+        time_interval (int): Interval between sampled frames in seconds
+
+    Returns:
+        list: List of (seconds, frame) tuples with BGR numpy frames
+    """
+    # Opt-in hardware decode: route ffmpeg through NVDEC. Gated behind an
+    # env var because the win is workload-dependent (codec, GPU, PCIe).
+    if os.getenv("USE_GPU_DECODE"):
+        os.environ.setdefault(
+            "OPENCV_FFMPEG_CAPTURE_OPTIONS",
+            "hwaccel;cuda|hwaccel_output_format;cuda"
+        )
+        cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG)
+    else:
+        cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise Exception("Could not open video file")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    # Calculate frame interval based on FPS and time interval
+    frame_interval = int(fps * time_interval)
+
+    # Seek to each target frame instead of decoding every frame and
+    # discarding the ones between intervals - the wasted decode is then
+    # bounded by the GOP size rather than the full video length
+    frames = []
+    for target in range(0, total_frames, frame_interval):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        # Seeking lands on the nearest decodable frame, so take the
+        # timestamp of the frame actually returned
+        current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        frames.append((current_time, frame))
+
+    cap.release()
+
+    return frames
+
+def _dhash(frame) -> int:
+    """
+    Compute a 64-bit difference hash (dHash) of a frame.
+
+    Downsamples to 9x8 grayscale and packs the adjacent-pixel comparison
+    bits into a single integer, so two hashes can be compared with a
+    popcount on their XOR.
+
+    Args:
+        frame (numpy.ndarray): BGR frame
+
+    Returns:
+        int: 64-bit perceptual hash
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    diff = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(diff).tobytes(), 'big')
+
+def _iter_processed_frames(raw_frames):
+    """
+    Preprocess decoded frames and drop near-duplicates.
+
+    Reuses a single 720p buffer for preprocessing and yields an owned
+    copy per kept frame.
+
+    Args:
+        raw_frames (list): List of (seconds, frame) tuples
+
+    Yields:
+        tuple: (video_timestamp, processed_frame)
+    """
+    preprocess_buffer = np.empty((720, 1280, 3), dtype=np.uint8)
+    last_hash = None
+
+    for current_time, frame in raw_frames:
+        # Calculate current timestamp
+        video_timestamp = str(timedelta(seconds=int(current_time)))
+
+        # Preprocess frame
+        processed_frame = preprocess_frame(frame, dst=preprocess_buffer).copy()
+
+        # Skip frames that are visually near-identical to the last kept
+        # one - every kept frame costs a Gemini call downstream
+        frame_hash = _dhash(processed_frame)
+        if last_hash is not None and (frame_hash ^ last_hash).bit_count() < FRAME_DEDUPE_HAMMING_THRESHOLD:
+            logger.debug(f"Skipping near-duplicate frame at {video_timestamp}")
+            continue
+        last_hash = frame_hash
+
+        yield video_timestamp, processed_frame
+
 def extract_frames(video_path, output_path, time_interval) -> list:
     """
-    Extract frames from the video at specified intervals and save them in 
+    Extract frames from the video at specified intervals and save them in
     a subfolder named after the video filename and timestamp.
-    
+
     Returns:
         list: List of dictionaries containing frame information, or None if an error occurs.
     """
     try:
         frames_data = []
 
-        # Open video file using OpenCV
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise Exception("Could not open video file")
-
-        # Get video information
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Decode on the GPU when torchcodec and CUDA are available,
+        # otherwise fall back to the OpenCV CPU loop
+        if _TORCHCODEC_AVAILABLE and torch.cuda.is_available():
+            try:
+                raw_frames = _decode_frames_gpu(video_path, time_interval)
+            except Exception as e:
+                logger.warning(f"GPU decode failed, falling back to CPU: {str(e)}")
+                raw_frames = _decode_frames_cpu(video_path, time_interval)
+        else:
+            raw_frames = _decode_frames_cpu(video_path, time_interval)
 
         # Create a unique subfolder inside output_path for this video
         video_filename = Path(video_path).stem  # Get filename without extension
@@ -33,28 +223,40 @@ def extract_frames(video_path, output_path, time_interval) -> list:
         frames_output_folder = Path(output_path) / f"{video_filename}_{timestamp}"
         frames_output_folder.mkdir(parents=True, exist_ok=True)  # Create folder if needed
 
-        # Calculate frame interval based on FPS and time interval
-        frame_interval = int(fps * time_interval)
+        if os.getenv("PACK_FRAMES"):
+            # Opt-in, storage-only export: pack all frames plus metadata
+            # into one uncompressed archive instead of hundreds of small
+            # files. The processing read path (get_video_folders /
+            # list_frame_files) only serves loose frame_* files, so
+            # packed videos are for archival, not for /process
+            archive_path = frames_output_folder / "frames.zip"
+            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED) as zf:
+                for video_timestamp, processed_frame in _iter_processed_frames(raw_frames):
+                    frame_filename = f"frame_{video_timestamp.replace(':', '_')}.jpg"
+                    ok, buf = cv2.imencode('.jpg', processed_frame, _JPEG_WRITE_PARAMS)
+                    if not ok:
+                        logger.warning(f"Failed to encode frame at {video_timestamp}")
+                        continue
+                    zf.writestr(frame_filename, buf.tobytes())
 
-        frame_count = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+                    frames_data.append(VideoFrame(
+                        timestamp=video_timestamp,
+                        video_path=f"{archive_path}/{frame_filename}"
+                    ))
 
-            # Save frame at specified intervals
-            if frame_count % frame_interval == 0:
-                # Calculate current timestamp
-                current_time = frame_count / fps
-                video_timestamp = str(timedelta(seconds=int(current_time)))
+                metadata = [frame.model_dump() for frame in frames_data]
+                zf.writestr("metadata.json", orjson.dumps(metadata))
 
-                # Preprocess frame
-                processed_frame = preprocess_frame(frame)
+            return frames_data
 
+        # Encode and write frames on worker threads so encoding frame N
+        # overlaps with preprocessing frame N+1
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for video_timestamp, processed_frame in _iter_processed_frames(raw_frames):
                 # Create filename and save frame inside the subfolder
                 frame_filename = f"frame_{video_timestamp.replace(':', '_')}.jpg"
                 frame_path = frames_output_folder / frame_filename
-                cv2.imwrite(str(frame_path), processed_frame)
+                pool.submit(cv2.imwrite, str(frame_path), processed_frame, _JPEG_WRITE_PARAMS)
 
                 # Store frame information
                 frames_data.append(VideoFrame(
@@ -62,37 +264,41 @@ def extract_frames(video_path, output_path, time_interval) -> list:
                     video_path=str(frame_path)
                 ))
 
-            frame_count += 1
-
-        cap.release()
-
         return frames_data
 
     except Exception as e:
         print(f"Error extracting frames: {str(e)}")
         return None
     
-def preprocess_frame(frame):
+def preprocess_frame(frame, dst=None):
     """
     Preprocess the extracted frame to optimize quality.
-    
+
     Processing steps:
     1. Resize to 720p resolution
     2. Adjust brightness and contrast
     3. Apply noise reduction
-    
+
     Args:
         frame (numpy.ndarray): Input frame to process
-        
+        dst (numpy.ndarray, optional): Preallocated 720p BGR output buffer.
+            Passing the same buffer across calls avoids a ~2.6 MB allocation
+            per frame; callers sharing a buffer must not use it concurrently.
+
     Returns:
         numpy.ndarray: Processed frame, or original frame if processing fails
     """
     try:
-        # Resize to 720p
-        frame = cv2.resize(frame, (1280, 720))
-        
-        # Apply custom processing based on frame content
-        frame_mean = frame.mean()
+        # Resize to 720p, reusing the caller's buffer when provided
+        if dst is not None:
+            cv2.resize(frame, (1280, 720), dst=dst)
+            frame = dst
+        else:
+            frame = cv2.resize(frame, (1280, 720))
+
+        # Estimate luminance on an 8x8-strided subsample - the branch only
+        # needs a coarse mean, so avoid a full-image reduction
+        frame_mean = frame[::8, ::8].mean()
         if frame_mean < 50:
             # Dark frame, increase brightness more
             alpha = 1.5
@@ -105,17 +311,84 @@ def preprocess_frame(frame):
             # Normal frame, use default values
             alpha = 1.2
             beta = 10
-        frame = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
-        
-        # Reduce noise
-        frame = cv2.GaussianBlur(frame, (3, 3), 0)
-        
+        # Adjust brightness/contrast and reduce noise in place to avoid
+        # allocating fresh buffers for each pass over the frame
+        cv2.convertScaleAbs(frame, dst=frame, alpha=alpha, beta=beta)
+        cv2.GaussianBlur(frame, (3, 3), 0, dst=frame)
+
         return frame
         
     except Exception as e:
         print(f"Error preprocessing frame: {str(e)}")
         return frame 
 
+async def save_metadata(frames_data: list, frames_folder) -> str:
+    """
+    Save extracted-frame metadata as JSON next to the frames.
+
+    Serializes with orjson and writes through aiofiles so the dump does
+    not block the event loop.
+
+    Args:
+        frames_data (list): List of VideoFrame objects
+        frames_folder: Folder the frames were written to
+
+    Returns:
+        str: Path to the metadata file, or None if an error occurs
+    """
+    try:
+        metadata = [frame.model_dump() for frame in frames_data]
+        data = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+
+        metadata_path = Path(frames_folder) / "metadata.json"
+        async with aiofiles.open(metadata_path, 'wb') as f:
+            await f.write(data)
+
+        logger.info(f"Saved frame metadata to: {metadata_path}")
+        return str(metadata_path)
+
+    except Exception as e:
+        logger.error(f"Error saving frame metadata: {str(e)}")
+        return None
+
+def plot_bounding_boxes_opencv(image, boxes: list) -> "np.ndarray":
+    """
+    Draw detected-object bounding boxes on an image.
+
+    Coordinates are denormalized from the 0-1000 range in a single NumPy
+    pass instead of per-box Python arithmetic.
+
+    Args:
+        image (numpy.ndarray): BGR image to draw on (modified in place)
+        boxes (list): List of dicts with 'box_2d' ([y1, x1, y2, x2] normalized
+            to 0-1000) and optional 'label' keys
+
+    Returns:
+        numpy.ndarray: The annotated image
+    """
+    if not boxes:
+        return image
+
+    height, width = image.shape[:2]
+
+    # Denormalize all box coordinates at once
+    coords = np.array([box["box_2d"] for box in boxes], dtype=np.float32)
+    coords *= np.array([height, width, height, width], dtype=np.float32) / 1000.0
+    coords = coords.astype(np.int32)
+
+    # Ensure y1 <= y2 and x1 <= x2 for every box
+    coords[:, [0, 2]] = np.sort(coords[:, [0, 2]], axis=1)
+    coords[:, [1, 3]] = np.sort(coords[:, [1, 3]], axis=1)
+
+    for box, (y1, x1, y2, x2) in zip(boxes, coords):
+        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        label = box.get("label")
+        if label:
+            cv2.putText(image, label, (x1 + 4, y1 + 16),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+    return image
+
 def validate_extension(video_path: str, allowed_extensions=ALLOWED_EXTENSIONS) -> bool:
     """
     Validate if the video file has an allowed extension.
@@ -200,28 +473,75 @@ def parse_frame_range(num_frames_str: str) -> tuple:
         
     return start_frame, end_frame
     
+@lru_cache(maxsize=64)
+def _list_frame_files_cached(frames_folder: str, mtime_ns: int) -> tuple:
+    """Scan a frame folder; mtime_ns in the key invalidates stale entries"""
+    with os.scandir(frames_folder) as entries:
+        return tuple(sorted(entry.name for entry in entries if entry.name.startswith('frame_')))
+
+def list_frame_files(frames_folder: str) -> list:
+    """
+    List frame filenames in a folder, sorted into index order
+
+    Frame indices in the API address this sorted list, so every caller
+    needs the full ordered listing. The scan is cached per directory
+    mtime, so repeated requests against an unchanged folder reuse it.
+
+    Args:
+        frames_folder (str): Folder containing extracted frames
+
+    Returns:
+        list: Sorted frame filenames
+    """
+    mtime_ns = os.stat(frames_folder).st_mtime_ns
+    return list(_list_frame_files_cached(frames_folder, mtime_ns))
+
+# Folder listings keyed by base path, invalidated via the directory's
+# mtime (creating or removing a video folder bumps it)
+_video_folders_lock = threading.Lock()
+_video_folders_cache: dict = {}
+
 def get_video_folders(frames_base_path: str) -> dict:
     """
     Get list of video folders from the frames directory
-    
+
+    The scan result is cached against the base directory's mtime, so
+    repeated calls (e.g. rebuilding the folder enum per request) skip
+    the nested directory walk.
+
     Args:
         frames_base_path (str): Base path where frame folders are stored
-        
+
     Returns:
         dict: Dictionary of folder names
     """
+    try:
+        base_mtime = os.path.getmtime(frames_base_path)
+    except OSError:
+        base_mtime = None
+
+    with _video_folders_lock:
+        cached = _video_folders_cache.get(frames_base_path)
+        if cached is not None and cached[0] == base_mtime:
+            return dict(cached[1])
+
     folders = {}
-    
+
     if os.path.exists(frames_base_path):
-        for item in os.listdir(frames_base_path):
-            item_path = os.path.join(frames_base_path, item)
-            if os.path.isdir(item_path):
-                frame_files = [f for f in os.listdir(item_path) if f.startswith('frame_')]
-                if frame_files:
-                    folders[item] = item
-    
+        with os.scandir(frames_base_path) as entries:
+            for item in entries:
+                if not item.is_dir(follow_symlinks=False):
+                    continue
+                # Stop at the first frame file; only presence matters here
+                with os.scandir(item.path) as frame_entries:
+                    if any(entry.name.startswith('frame_') for entry in frame_entries):
+                        folders[item.name] = item.name
+
     # If no folders found, add a placeholder
     if not folders:
         folders["no_videos_available"] = "no_videos_available"
-        
+
+    with _video_folders_lock:
+        _video_folders_cache[frames_base_path] = (base_mtime, dict(folders))
+
     return folders
\ No newline at end of file
@@ -1,18 +1,20 @@
 import os
-import asyncio
 from pathlib import Path
 
 from dotenv import load_dotenv
 from transformers import pipeline
+from PIL import Image
+import torch
+import httpx
 from google import genai
-from openai import OpenAI
+from openai import AsyncOpenAI
 from aiogtts import aiogTTS
 import kokoro
 
 from src.utils.logger import reset_logger, logger
 from src.utils.constant import (
-    OUTPUT_PATH, OUTPUT_FRAME_PATH, OUTPUT_AUDIO_PATH, 
-    DEPTH_MODEL, OUTPUT_REPORTS_PATH,
+    OUTPUT_PATH, OUTPUT_FRAME_PATH, OUTPUT_AUDIO_PATH,
+    DEPTH_MODEL, DEPTH_PRECISION, OUTPUT_REPORTS_PATH,
     KOKORO_REPO_ID
 )
 reset_logger()
@@ -36,13 +38,25 @@ class Initializer:
             self.openai_client = None
             self.kokoro_pipeline = None
             self.aiogTTS_engine = None
+            self.models_ready = False
             Initializer._is_initialized = True
 
     async def initialize_models(self):
-        """Initialize all models and resources"""
+        """Initialize all models and resources (idempotent)"""
         try:
+            # Skip when already initialized, e.g. when the FastAPI lifespan
+            # runs after an import-time initialization
+            if self.models_ready:
+                logger.info("Models already initialized, skipping")
+                return
+
             logger.info("Starting model initialization...")
-            
+
+            # Depth inputs have a fixed shape, so let cuDNN benchmark
+            # once and reuse the fastest kernels
+            if torch.cuda.is_available():
+                torch.backends.cudnn.benchmark = True
+
             # Initialize depth estimation model
             await self._init_depth_model()
             
@@ -57,7 +71,8 @@ class Initializer:
             
             # Create output directories
             self._create_output_dirs()
-            
+
+            self.models_ready = True
             logger.info("Model initialization completed")
             
         except Exception as e:
@@ -69,12 +84,44 @@ class Initializer:
         try:
             model_name = DEPTH_MODEL
             logger.info(f"Loading depth model: {model_name}")
-            
-            self.depth_model = pipeline(
-                task="depth-estimation",
-                model=model_name
-            )
-            
+
+            if torch.cuda.is_available():
+                # FP16 halves memory bandwidth and roughly doubles
+                # throughput; depth estimation tolerates the precision loss
+                dtype = torch.float16 if DEPTH_PRECISION == "fp16" else torch.float32
+                self.depth_model = pipeline(
+                    task="depth-estimation",
+                    model=model_name,
+                    device=0,
+                    torch_dtype=dtype
+                )
+
+                # Frames from one video share a resolution, so compiled
+                # kernels are reused across calls. Compilation is lazy,
+                # so force warm-up forwards here; an inductor/triton
+                # failure then degrades to the eager model at startup
+                # instead of emptying every depth result at request time.
+                # dynamic=True keeps the varying batch sizes the batched
+                # path sends from triggering fresh captures per size, and
+                # the second warm-up exercises that batched shape
+                eager_model = self.depth_model.model
+                try:
+                    self.depth_model.model = torch.compile(
+                        eager_model, mode="reduce-overhead", dynamic=True
+                    )
+                    warm_frame = Image.new("RGB", (1280, 720))
+                    self.depth_model(warm_frame)
+                    self.depth_model([warm_frame, warm_frame], batch_size=2)
+                    logger.info("Depth model compiled with torch.compile")
+                except Exception as e:
+                    logger.warning(f"torch.compile unavailable for depth model, using eager: {str(e)}")
+                    self.depth_model.model = eager_model
+            else:
+                self.depth_model = pipeline(
+                    task="depth-estimation",
+                    model=model_name
+                )
+
             logger.info("Depth model loaded successfully")
             
         except Exception as e:
@@ -104,7 +151,15 @@ class Initializer:
                 raise ValueError("OPENAI_API_KEY not configured")
                 
             logger.info("Initializing OpenAI client")
-            self.openai_client = OpenAI(api_key=api_key)
+            # Async client over a pooled transport: concurrent TTS calls
+            # reuse keep-alive connections instead of new TLS handshakes.
+            # HTTP/2 is skipped since the h2 extra is not a dependency.
+            self.openai_client = AsyncOpenAI(
+                api_key=api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+                )
+            )
             logger.info("OpenAI client initialized successfully")
             
         except Exception as e:
@@ -183,5 +238,4 @@ class Initializer:
         """Get instance of aiogTTS engine"""
         return self.aiogTTS_engine
 
-initializer = Initializer()
-asyncio.run(initializer.initialize_models())
\ No newline at end of file
+initializer = Initializer()
\ No newline at end of file
@@ -9,6 +9,14 @@ TIME_INTERVAL = 1
 
 # Depth estimation model
 DEPTH_MODEL= "depth-anything/Depth-Anything-V2-Small-hf"
+DEPTH_MAP_CACHE_SIZE = 32  # Cached depth maps (one per frame image)
+DEPTH_PRECISION = "fp16"  # "fp16" or "fp32"; fp16 only applies on CUDA
+
+# Depth request batching: requests arriving within the window are
+# flushed together as one batched forward pass
+DEPTH_BATCH_MAX = 4
+DEPTH_BATCH_WINDOW = 0.05  # seconds
+DEPTH_BATCH_SIZE = 8  # Images per forward pass inside the HF pipeline
 
 # Text-to-Speech Constants
 TTS_ENGINE_OPENAI = "openai"
@@ -59,12 +67,44 @@ Ensure that:
 
 Do not return Markdown, explanations, or extra text. Return ONLY the JSON."""
 
+BATCH_PROMPT_TEMPLATE = """Detect objects in each of the provided images. Return the output as a JSON list containing exactly one entry per image, in the same order the images are given. Each entry is itself a JSON list of the objects detected in that image, where each object contains:
+- 'box_2d': The 2D bounding box as [y_min, x_min, y_max, x_max].
+- 'label': The name of the object (e.g., 'bus', 'car', 'man').
+- 'position': The relative position of the object in the image ('left', 'right', 'center').
+- 'type': The category or type of the object (e.g., 'vehicle', 'animal', 'person', 'building', etc.).
+
+Ensure that:
+- 'label' only contains the object's general category, not specific attributes.
+- 'position' describes the object's placement.
+- 'type' describes the broader classification of the object.
+
+Do not return Markdown, explanations, or extra text. Return ONLY the JSON."""
+
 #Process video
 
 ALLOWED_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
 
+# Uploaded videos are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Reject uploads larger than this before doing any work
+MAX_UPLOAD_SIZE = 500 * 1024 * 1024  # 500 MiB
+
+# Frames whose dHash is within this Hamming distance of the previous kept
+# frame are treated as duplicates and skipped
+FRAME_DEDUPE_HAMMING_THRESHOLD = 5
+
+# Cached detection results keyed by frame dHash
+DETECTION_CACHE_SIZE = 128
+
 CONCURRENCY_LIMIT = 5
 
+# Frames per detection batch when processing a range
+DETECTION_BATCH = 16
+
+# Upper bound on objects scored per frame (the detector returns top 10)
+MAX_OBJECTS = 10
+
 # Navigation priority weights
 PRIORITY_DEPTH_WEIGHT = 0.5
 PRIORITY_POSITION_WEIGHT = 0.2
@@ -85,22 +125,34 @@ FRAME_NORMALIZED_AREA = FRAME_NORMALIZED_WIDTH * FRAME_NORMALIZED_HEIGHT
 AUDIO_SAMPLE_RATE = 24000
 AUDIO_FORMAT = 'WAV'
 
+# Synthesized-audio cache (in-memory entries; disk copies live under
+# OUTPUT_AUDIO_PATH/_cache and survive restarts)
+TTS_CACHE_SIZE = 256
+
 # API settings
 DEFAULT_PORT = 8000
 DEFAULT_HOST = "0.0.0.0"
 
 # Model settings
 GEMINI_TEMPERATURE = 0
+GEMINI_INPUT_MAX_SIZE = 620  # Longest image side sent to the API
+GEMINI_MAX_RETRIES = 3
+GEMINI_RETRY_BASE_DELAY = 1.0  # seconds, doubled on each retry
+GEMINI_BATCH_MAX = 8  # Most images coalesced into one multi-image request
 
 # High risk object types
 HIGH_RISK_OBJECTS = ['person', 'car', 'motorcycle', 'truck', 'bus', 'vehicle']
 MEDIUM_RISK_OBJECTS = ['bicycle', 'dog', 'pothole', 'stairs', 'structure']
 LOW_RISK_OBJECTS = ['traffic_light', 'stop_sign', 'door']
 MINIMAL_RISK_OBJECTS = ['bench', 'wall', 'tree', 'building']
-EXCLUDED_OBJECTS = [
-    'mountain', 'land', 'sky', 'lake', 'sea', 'ocean', 'river', 'cloud', 
+# Frozensets give O(1) membership checks on the per-object filter path
+EXCLUDED_OBJECTS = frozenset({
+    'mountain', 'land', 'sky', 'lake', 'sea', 'ocean', 'river', 'cloud',
     'forest', 'grass', 'field', 'landscape', 'hill', 'valley'
-]
+})
+EXCLUDED_TYPES = frozenset({
+    'geographical feature', 'atmospheric', 'body of water', 'surface'
+})
 
 # Video enhancement parameters
 LIGHT_ENHANCEMENT_ALPHA = 1.5
@@ -109,6 +161,9 @@ NORMAL_ENHANCEMENT_ALPHA = 1.0
 DARK_ENHANCEMENT_ALPHA = 1.2
 DARK_ENHANCEMENT_BETA = 10
 
+# Memoized guidance sentences keyed by scene signature
+GUIDANCE_CACHE_SIZE = 128
+
 # Warning level thresholds
 WARNING_HIGH_THRESHOLD = 0.7
 WARNING_MEDIUM_THRESHOLD = 0.3